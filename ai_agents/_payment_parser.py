@@ -0,0 +1,42 @@
+# _payment_parser.py :: Payment Email Parsing for Zenorc
+#
+# The CPU-bound part of the email poll path: deciding whether an email body
+# is a valid payment notification and extracting its transaction ID.
+# Both functions expect the body to be lowercased once by the caller, which
+# lets the patterns skip per-character case folding.
+#
+# It is kept in its own dependency-free module so that it can optionally be
+# compiled to a C extension with mypyc (see setup.py). The pure-Python module
+# is used whenever the compiled extension is not present.
+
+import re
+import time
+
+_TXN_PATTERNS = [
+    re.compile(r"reference\s*(?:no\.?|number)?\s*[:\-]?\s*(\d{8,})"),
+    re.compile(r"transaction reference number\s*(?:is)?\s*[:\-]?\s*(\d{8,})"),
+]
+
+def extract_txn_id(body_lc: str, uid: int) -> str:
+    """
+    Extracts a transaction ID from the lowercased email body using regex patterns.
+    Falls back to an ID built from the time and the email's IMAP UID if no
+    pattern matches, so two such emails scanned in the same second stay distinct.
+    """
+    for pattern in _TXN_PATTERNS:
+        match = pattern.search(body_lc)
+        if match:
+            return match.group(1)
+    # Fallback for emails where the regex fails
+    return f"TXN{int(time.time())}-{uid}"
+
+_AMT_5_RE = re.compile(r"(?:₹|rs\.?|inr)\s*[, ]*\s*5(?:[.,]00)?\b")
+
+def is_valid_payment(body_lc: str) -> bool:
+    """
+    Checks if a lowercased email body indicates a valid incoming ₹5 payment.
+    """
+    # Cheap substring checks first; most bodies never reach the regex.
+    if "credited" not in body_lc or "debited" in body_lc:
+        return False
+    return _AMT_5_RE.search(body_lc) is not None
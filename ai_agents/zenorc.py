@@ -4,7 +4,7 @@
 # to be imported and started by a separate application runner (like zen.py).
 #
 # It performs the following tasks in background threads:
-#   1. Polls a GMail inbox for specific payment notification emails.
+#   1. Watches a GMail inbox (via IMAP IDLE) for payment notification emails.
 #   2. Parses these emails to extract a transaction ID.
 #   3. Logs the transaction details to a Google Sheet to prevent duplicates.
 #   4. Adds the transaction to an in-memory queue.
@@ -14,22 +14,32 @@
 from __future__ import annotations
 
 import email
-import imaplib
+import hashlib
+import itertools
+import math
 import os
-import re
 import threading
 import time
 import uuid
-from collections import deque
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Optional
-from zoneinfo import ZoneInfo
+from queue import SimpleQueue
+from typing import Callable, Optional, TypeVar
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import gspread
 import paho.mqtt.client as mqtt
 from dotenv import load_dotenv
+from imapclient import SEEN, IMAPClient
+from imapclient.exceptions import IMAPClientAbortError
 from oauth2client.service_account import ServiceAccountCredentials
 
+# Relative when imported as ai_agents.zenorc, top-level when ai_agents/ is on sys.path
+try:
+    from ._payment_parser import extract_txn_id, is_valid_payment
+except ImportError:
+    from _payment_parser import extract_txn_id, is_valid_payment
+
 # ╭─ CONFIGURATION ────────────────────────────────────────────────╮
 # Load environment variables from a .env file if it exists.
 load_dotenv()
@@ -55,6 +65,124 @@ GSHEET_CREDS_PATH = os.getenv("GSHEET_CREDS_PATH", "/etc/secrets/Zenorc.json")
 SEARCH_STRINGS = tuple(s.strip().lower() for s in os.getenv("SEARCH_STRINGS", "₹5,Rs 5,INR 5").split(","))
 # Minimum time in seconds between processing queued items.
 COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "40"))
+# Number of most recent unseen emails fetched per poll, in a single round-trip.
+# Capped at 100; larger batches bring no measurable gain.
+FETCH_BATCH_SIZE = min(int(os.getenv("FETCH_BATCH_SIZE", "30")), 100)
+# Maximum seconds to stay in IMAP IDLE before re-issuing it. Gmail drops
+# IDLE after 30 minutes, and RFC 2177 asks clients to re-issue it sooner.
+IMAP_IDLE_SECONDS = int(os.getenv("IMAP_IDLE_SECONDS", str(29 * 60)))
+# Maximum seconds between inbox rescans while idling. A safety net for new-mail
+# notices the server sent outside IDLE, which IDLE does not repeat.
+IMAP_RESCAN_SECONDS = int(os.getenv("IMAP_RESCAN_SECONDS", "60"))
+# Socket timeout in seconds for IMAP commands. A dead connection then fails with
+# an OSError, and the session is rebuilt instead of hanging forever.
+IMAP_TIMEOUT_SECONDS = int(os.getenv("IMAP_TIMEOUT_SECONDS", "60"))
+# Maximum seconds a logged payment waits before being flushed to Google Sheets.
+SHEET_FLUSH_SECONDS = int(os.getenv("SHEET_FLUSH_SECONDS", "5"))
+# Maximum number of rows appended to Google Sheets in a single API call.
+SHEET_BATCH_SIZE = int(os.getenv("SHEET_BATCH_SIZE", "50"))
+# Number of transaction IDs held by each generation of the dedup Bloom filter.
+TXN_FILTER_CAPACITY = int(os.getenv("TXN_FILTER_CAPACITY", "65536"))
+# Target false-positive rate of the dedup Bloom filter.
+TXN_FILTER_ERROR_RATE = float(os.getenv("TXN_FILTER_ERROR_RATE", "0.001"))
+# Maximum number of recent sheet rows loaded into the dedup filter on startup.
+# The filter only retains two generations of TXN_FILTER_CAPACITY IDs anyway.
+BOOTSTRAP_MAX_ROWS = int(os.getenv("BOOTSTRAP_MAX_ROWS", str(2 * TXN_FILTER_CAPACITY)))
+# Maximum number of email UIDs remembered as already scanned.
+SEEN_UIDS_MAXLEN = int(os.getenv("SEEN_UIDS_MAXLEN", "4096"))
+# ╰────────────────────────────────────────────────────────────────╯
+
+
+# ╭─ DEDUP STRUCTURES ─────────────────────────────────────────────╮
+class _BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+
+    The bit array and hash count are sized from the expected number of
+    entries `n` and the target false-positive rate `p`:
+        m = -n * ln(p) / ln(2)^2,  k = (m / n) * ln(2)
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: derive all k positions from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TxnFilter:
+    """
+    A two-generation Bloom filter of transaction IDs.
+
+    New IDs go into the "active" filter. Once it holds TXN_FILTER_CAPACITY
+    entries it becomes the "inactive" filter and a fresh active one is started,
+    so memory stays bounded and very old transactions eventually age out.
+    Membership is checked against both generations.
+
+    Being a Bloom filter, `in` may return a false positive but never a false
+    negative; see `_txn_logged` for how positives are confirmed.
+    """
+
+    def __init__(self, capacity: int = TXN_FILTER_CAPACITY, error_rate: float = TXN_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._active = _BloomFilter(capacity, error_rate)
+        self._inactive = _BloomFilter(capacity, error_rate)
+
+    def add(self, txn_id: str):
+        if self._active.count >= self.capacity:
+            self._inactive = self._active
+            self._active = _BloomFilter(self.capacity, self.error_rate)
+        self._active.add(txn_id)
+
+    def __contains__(self, txn_id: str) -> bool:
+        return txn_id in self._active or txn_id in self._inactive
+
+    def __len__(self) -> int:
+        return self._active.count + self._inactive.count
+
+
+class _SeenUIDs:
+    """
+    A bounded set of email UIDs that evicts the oldest entry once it holds
+    `maxlen` UIDs.
+
+    Only the most recent FETCH_BATCH_SIZE unseen emails are ever scanned, so
+    forgetting old UIDs at worst causes a stale email to be re-fetched.
+    """
+
+    def __init__(self, maxlen: int = SEEN_UIDS_MAXLEN):
+        self.maxlen = maxlen
+        self._uids: OrderedDict[int, None] = OrderedDict()
+
+    def add(self, uid: int):
+        if uid in self._uids:
+            self._uids.move_to_end(uid)
+            return
+        if len(self._uids) >= self.maxlen:
+            self._uids.popitem(last=False)
+        self._uids[uid] = None
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self._uids
+
+    def __len__(self) -> int:
+        return len(self._uids)
 # ╰────────────────────────────────────────────────────────────────╯
 
 
@@ -65,24 +193,63 @@ COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "40"))
 # A thread-safe lock for IMAP operations to prevent simultaneous access.
 imap_lock = threading.Lock()
 
-# A set of email UIDs that have been seen in the current session.
-# This is an in-memory cache to avoid reprocessing emails immediately.
-seen_uids: set[bytes] = set()
+# A lock guarding creation of the cached Google Sheets worksheet handle.
+sheet_lock = threading.Lock()
+
+# The authorized worksheet handle, built once and re-used for every Sheets call.
+_ws: Optional[gspread.Worksheet] = None
+
+# Rows waiting to be appended to Google Sheets by the flusher thread.
+# Rows are only removed once they have been written successfully.
+_sheet_queue: deque[list[str]] = deque()
+
+# Set when a full batch of rows is waiting, to wake the flusher early.
+_sheet_pending = threading.Event()
 
-# A set of transaction IDs that have been successfully logged to Google Sheets.
-# This serves as the persistent record of processed transactions.
-# It is bootstrapped from the Google Sheet on startup.
-seen_txn_ids: set[str] = set()
+# A lock guarding creation of the shared MQTT client.
+mqtt_lock = threading.Lock()
 
-# A thread-safe double-ended queue holding transaction IDs that are
-# waiting to be processed by the MQTT publisher.
-queue: deque[str] = deque()
+# The persistent MQTT client, connected once and re-used for every publish.
+_mqtt_client: Optional[mqtt.Client] = None
+
+# Set while `_mqtt_client` is connected to the broker.
+_mqtt_connected = threading.Event()
+
+# The long-lived IMAP session, re-used across polls. Guarded by `imap_lock`.
+_imap_conn: Optional[IMAPClient] = None
+
+# The highest unseen UID found by the last inbox scan. Guarded by `imap_lock`.
+_last_scanned_uid: int = 0
+
+# The most recent email UIDs that have been seen in the current session.
+# This is a bounded in-memory cache to avoid reprocessing emails immediately.
+seen_uids: _SeenUIDs = _SeenUIDs()
+
+# A Bloom filter of transaction IDs that have been logged to Google Sheets
+# (or are queued to be). The sheet itself is the persistent record of processed
+# transactions; this filter is bootstrapped from it on startup. See TxnFilter.
+seen_txn_ids: TxnFilter = TxnFilter()
+
+# A thread-safe FIFO queue holding transaction IDs that are waiting to be
+# processed by the MQTT publisher. The processor thread blocks on it; `stop`
+# enqueues None to wake it up.
+queue: SimpleQueue[Optional[str]] = SimpleQueue()
+
+# A lock guarding `status`, which is shared by the main loop and processor.
+status_lock = threading.Lock()
 
 # A dictionary to track the status of transactions ("Queued", "Processing", etc.).
 status: dict[str, str] = {}
 
-# Timestamp of the last time a transaction was processed. Used for cooldown logic.
+# Timestamp of the last time a transaction was processed. Used for cooldown
+# logic; only touched by the processor thread.
 last_processed: float = 0.0
+
+# Set by `stop` to ask every background thread to exit.
+_stop = threading.Event()
+
+# The background threads started by `start`, joined by `stop`.
+_threads: list[threading.Thread] = []
 # ╰────────────────────────────────────────────────────────────────╯
 
 
@@ -91,83 +258,200 @@ def log(msg: str, level: str = "INFO"):
     """Prints a formatted log message to stdout."""
     print(f"[{level}] {msg}", flush=True)
 
-def tz_mumbai() -> ZoneInfo:
-    """Returns the Asia/Mumbai timezone, falling back to UTC if not found."""
-    try:
-        return ZoneInfo("Asia/Mumbai")
-    except ZoneInfoNotFoundError:
-        return ZoneInfo("UTC")
+# The Asia/Mumbai timezone, resolved once at import (falls back to UTC).
+try:
+    _TZ_MUMBAI = ZoneInfo("Asia/Mumbai")
+except ZoneInfoNotFoundError:
+    _TZ_MUMBAI = ZoneInfo("UTC")
 # ╰────────────────────────────────────────────────────────────────╯
 
 
 # ╭─ GOOGLE SHEETS INTEGRATION ────────────────────────────────────╮
+T = TypeVar("T")
+
 def _sheet() -> gspread.Worksheet:
     """
-    Connects to the Google Sheets API and returns the worksheet object.
+    Returns the worksheet object, connecting to the Google Sheets API on
+    first use and re-using the cached handle thereafter.
 
     Raises:
         RuntimeError: If GSHEET_URL environment variable is not set.
         FileNotFoundError: If the credentials file is not found.
     """
-    if not GSHEET_URL:
-        raise RuntimeError("GSHEET_URL env var missing")
-    if not os.path.isfile(GSHEET_CREDS_PATH):
-        raise FileNotFoundError(f"Credentials not found: {GSHEET_CREDS_PATH}")
-
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(GSHEET_CREDS_PATH, scope)
-    client = gspread.authorize(creds)
-    return client.open_by_url(GSHEET_URL).sheet1
+    global _ws
+    with sheet_lock:
+        if _ws is not None:
+            return _ws
+
+        if not GSHEET_URL:
+            raise RuntimeError("GSHEET_URL env var missing")
+        if not os.path.isfile(GSHEET_CREDS_PATH):
+            raise FileNotFoundError(f"Credentials not found: {GSHEET_CREDS_PATH}")
+
+        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+        creds = ServiceAccountCredentials.from_json_keyfile_name(GSHEET_CREDS_PATH, scope)
+        client = gspread.authorize(creds)
+        _ws = client.open_by_url(GSHEET_URL).sheet1
+        return _ws
+
+def _sheet_call(fn: Callable[[gspread.Worksheet], T]) -> T:
+    """
+    Runs `fn` against the cached worksheet. If the API rejects the cached
+    credentials (401/403), the cache is cleared and the call retried once.
+    """
+    global _ws
+    try:
+        return fn(_sheet())
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code not in (401, 403):
+            raise
+        log(f"Sheets authorization rejected ({e.response.status_code}). Reconnecting...", "WARN")
+        with sheet_lock:
+            _ws = None
+        return fn(_sheet())
+
+def _column_a(ws: gspread.Worksheet, first: int, last: int) -> list[str]:
+    """Reads A{first}:A{last}; the API trims trailing empty cells from the result."""
+    columns = ws.get(f"A{first}:A{last}", major_dimension="COLUMNS")
+    return columns[0] if columns else []
+
+def _recent_txn_ids(ws: gspread.Worksheet) -> list[str]:
+    """
+    Fetches the transaction IDs from the last BOOTSTRAP_MAX_ROWS data rows of
+    the sheet with bounded range reads, rather than the whole column.
 
-def _bootstrap_txns() -> set[str]:
+    `row_count` is the grid size, which can include trailing blank rows. The
+    first read covers the last BOOTSTRAP_MAX_ROWS grid rows; when it comes back
+    short, the rows it missed above it are read as well.
+    """
+    start = max(1, ws.row_count - BOOTSTRAP_MAX_ROWS + 1)
+    ids = _column_a(ws, start, ws.row_count)
+    missed = ws.row_count - (start + len(ids) - 1)
+    if start > 1 and missed > 0:
+        # With no data in the window the last data row is unknown, so read everything above it
+        first = max(1, start - missed) if ids else 1
+        ids = (_column_a(ws, first, start - 1) + ids)[-BOOTSTRAP_MAX_ROWS:]
+    return ids
+
+def _bootstrap_txns() -> TxnFilter:
     """
-    Loads existing transaction IDs from the Google Sheet to prevent reprocessing.
+    Loads recent transaction IDs from the Google Sheet to prevent reprocessing.
     This is called once on startup.
     """
+    processed_txns = TxnFilter()
     try:
         log("Bootstrapping transaction history from Google Sheets...")
-        processed_txns = set(_sheet().col_values(1))
+        for txn_id in _sheet_call(_recent_txn_ids):
+            if txn_id:
+                processed_txns.add(txn_id)
         log(f"Loaded {len(processed_txns)} existing transaction IDs.")
-        return processed_txns
     except Exception as e:
         log(f"Sheets bootstrap failed: {e}", "WARN")
-        return set()
+    return processed_txns
+
+def _column_a_contains(ws: gspread.Worksheet, txn_id: str) -> bool:
+    """
+    Looks for a transaction ID in column A, BOOTSTRAP_MAX_ROWS rows at a time
+    from the bottom up. Recent payments match in the first read, and no single
+    request pulls the whole sheet the way `ws.find` does.
+    """
+    last = ws.row_count
+    while last >= 1:
+        first = max(1, last - BOOTSTRAP_MAX_ROWS + 1)
+        if txn_id in _column_a(ws, first, last):
+            return True
+        last = first - 1
+    return False
+
+def _txn_logged(txn_id: str) -> Optional[bool]:
+    """
+    Confirms against the Google Sheet that a transaction ID has been logged.
+
+    Used to rule out Bloom filter false positives in `seen_txn_ids`, so that a
+    genuinely new payment is never skipped. Rows still waiting to be flushed
+    count as logged. Returns None if the sheet cannot be reached, so the
+    caller can retry later instead of guessing.
+    """
+    if any(row[0] == txn_id for row in list(_sheet_queue)):
+        return True
+    try:
+        return _sheet_call(lambda ws: _column_a_contains(ws, txn_id))
+    except Exception as e:
+        log(f"Sheets lookup failed for {txn_id}: {e}", "WARN")
+        return None
 
 def log_payment(txn_id: str, amount: str = "5"):
     """
-    Appends a new payment record to the Google Sheet.
+    Queues a new payment record to be appended to the Google Sheet.
+
+    The row is written asynchronously by `sheet_flusher`; the transaction ID
+    is marked as seen immediately so duplicates are filtered right away.
 
     Args:
         txn_id: The unique transaction identifier.
         amount: The amount of the transaction (defaults to "5").
     """
-    try:
-        sheet = _sheet()
-        now = datetime.now(tz_mumbai())
-        row_data = [txn_id, amount, now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S")]
-        sheet.append_row(row_data)
-        seen_txn_ids.add(txn_id)
-        log(f"Logged {txn_id} to Google Sheets.")
-    except Exception as e:
-        log(f"Failed to log payment to Google Sheets: {e}", "ERROR")
+    now = datetime.now(_TZ_MUMBAI)
+    row_data = [txn_id, amount, now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S")]
+    seen_txn_ids.add(txn_id)
+    _sheet_queue.append(row_data)
+    if len(_sheet_queue) >= SHEET_BATCH_SIZE:
+        _sheet_pending.set()
+    log(f"Queued {txn_id} for Google Sheets.")
+
+def sheet_flusher():
+    """
+    The Google Sheets flusher thread function.
+
+    Every SHEET_FLUSH_SECONDS, or as soon as SHEET_BATCH_SIZE rows are waiting,
+    appends the queued rows to the sheet with a single `append_rows` call.
+    Rows that fail to be written stay at the front of the queue and are
+    retried on the next flush. Remaining rows are flushed once more on stop.
+    """
+    while not _stop.is_set():
+        _sheet_pending.wait(timeout=SHEET_FLUSH_SECONDS)
+        _sheet_pending.clear()
+        _flush_sheet_queue()
+    _flush_sheet_queue()
+
+def _flush_sheet_queue():
+    """Appends queued rows to the sheet in batches until the queue is empty or a write fails."""
+    while _sheet_queue:
+        rows = list(itertools.islice(_sheet_queue, SHEET_BATCH_SIZE))
+        try:
+            # RAW, like the original append_row: IDs must stay text (no dropped zeros or rounding)
+            _sheet_call(lambda ws: ws.append_rows(rows, value_input_option="RAW"))
+        except Exception as e:
+            log(f"Failed to log {len(rows)} payment(s) to Google Sheets: {e}", "ERROR")
+            return
+        for _ in rows:
+            _sheet_queue.popleft()
+        log(f"Logged {len(rows)} payment(s) to Google Sheets: {', '.join(r[0] for r in rows)}")
 # ╰────────────────────────────────────────────────────────────────╯
 
 
 # ╭─ MQTT PUBLISHER ───────────────────────────────────────────────╮
-def send_mqtt(max_retries: int = 3, retry_delay: int = 5) -> bool:
+def _on_mqtt_connect(_client, _userdata, _flags, reason_code, _properties):
+    if reason_code.is_failure:
+        log(f"↳ MQTT connection refused: {reason_code}", "WARN")
+        return
+    log("↳ MQTT connected successfully.")
+    _mqtt_connected.set()
+
+def _on_mqtt_disconnect(_client, _userdata, _flags, reason_code, _properties):
+    _mqtt_connected.clear()
+    log(f"↳ MQTT disconnected: {reason_code}", "WARN")
+
+def _get_mqtt() -> mqtt.Client:
     """
-    Connects to the MQTT broker and publishes a "paid" message.
+    Returns the shared MQTT client, creating it on first use.
 
-    Args:
-        max_retries: The maximum number of times to retry connecting.
-        retry_delay: The delay in seconds between retries.
-
-    Returns:
-        True if the message was published successfully, False otherwise.
+    The client connects asynchronously and runs its network loop in a
+    background thread, which also reconnects automatically after a drop.
     """
-    for attempt in range(1, max_retries + 1):
-        try:
-            connected = threading.Event()
+    global _mqtt_client
+    with mqtt_lock:
+        if _mqtt_client is None:
             client = mqtt.Client(
                 client_id=CLIENT_ID,
                 protocol=mqtt.MQTTv311,
@@ -175,77 +459,206 @@ def send_mqtt(max_retries: int = 3, retry_delay: int = 5) -> bool:
             )
             if MQTT_USERNAME:
                 client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
-
-            def on_connect(c, *_):
-                log("↳ MQTT connected successfully.")
-                connected.set()
-
-            client.on_connect = on_connect
+            client.on_connect = _on_mqtt_connect
+            client.on_disconnect = _on_mqtt_disconnect
             client.tls_set()
-            client.connect(MQTT_BROKER, MQTT_PORT)
+            client.connect_async(MQTT_BROKER, MQTT_PORT, keepalive=60)
             client.loop_start()
+            _mqtt_client = client
+        return _mqtt_client
 
-            if not connected.wait(timeout=10):
+def send_mqtt(max_retries: int = 3, retry_delay: int = 5) -> bool:
+    """
+    Publishes a "paid" message over the shared MQTT connection.
+
+    Args:
+        max_retries: The maximum number of times to retry publishing.
+        retry_delay: The delay in seconds between retries.
+
+    Returns:
+        True if the message was published successfully, False otherwise.
+    """
+    for attempt in range(1, max_retries + 1):
+        try:
+            client = _get_mqtt()
+            if not _mqtt_connected.wait(timeout=10):
                 raise TimeoutError("MQTT connection timed out")
 
-            rc, mid = client.publish(MQTT_TOPIC, "paid", qos=1)
-            if rc != mqtt.MQTT_ERR_SUCCESS:
-                raise ConnectionError(f"Publish failed with code: {mqtt.error_string(rc)}")
-            
-            log(f"↳ MQTT publish successful (mid={mid})")
+            info = client.publish(MQTT_TOPIC, "paid", qos=1)
+            if info.rc == mqtt.MQTT_ERR_NO_CONN:
+                # The socket dropped before on_disconnect cleared `_mqtt_connected`. paho
+                # has still queued the QoS 1 message and resends it after reconnecting.
+                # (wait_for_publish would raise on this rc, so it is not called.)
+                log(f"↳ MQTT offline, publish queued for redelivery (mid={info.mid})", "WARN")
+                return True
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                raise ConnectionError(f"Publish failed with code: {mqtt.error_string(info.rc)}")
+
+            # Once queued, paho redelivers the message after a reconnect, so
+            # an unacknowledged publish must not be retried here.
+            info.wait_for_publish(timeout=10)
+            if info.is_published():
+                log(f"↳ MQTT publish successful (mid={info.mid})")
+            else:
+                log(f"↳ MQTT publish queued, awaiting acknowledgement (mid={info.mid})", "WARN")
             return True
         except Exception as e:
             log(f"MQTT attempt {attempt} failed: {e}", "WARN")
             if attempt < max_retries:
                 time.sleep(retry_delay)
-        finally:
-            if 'client' in locals() and client.is_connected():
-                client.loop_stop()
-                client.disconnect()
-                log("↳ MQTT disconnected.")
     return False
 # ╰────────────────────────────────────────────────────────────────╯
 
 
 # ╭─ EMAIL PROCESSOR ──────────────────────────────────────────────╮
-def _imap_login() -> imaplib.IMAP4_SSL:
+def _imap_login() -> IMAPClient:
     """Establishes a connection to the IMAP server."""
     if not EMAIL_ID or not EMAIL_PASSWORD:
         raise RuntimeError("EMAIL_ID or EMAIL_PASSWORD missing from environment.")
-    imap = imaplib.IMAP4_SSL("imap.gmail.com")
+    imap = IMAPClient("imap.gmail.com", ssl=True, timeout=IMAP_TIMEOUT_SECONDS)
     imap.login(EMAIL_ID, EMAIL_PASSWORD)
     return imap
 
-def _extract_txn_id(body: str) -> str:
+def _get_imap() -> IMAPClient:
+    """
+    Returns the shared IMAP session, logging in and selecting the inbox on
+    first use. The caller must hold `imap_lock`.
+    """
+    global _imap_conn
+    if _imap_conn is None:
+        log("Opening IMAP session...")
+        conn = _imap_login()
+        conn.select_folder("INBOX")
+        _imap_conn = conn
+    return _imap_conn
+
+def _drop_imap():
+    """Discards the shared IMAP session. The caller must hold `imap_lock`."""
+    global _imap_conn
+    if _imap_conn is not None:
+        try:
+            _imap_conn.logout()
+        except Exception:
+            pass
+    _imap_conn = None
+
+# How often, in seconds, a pending IDLE checks whether `stop` was requested.
+_IDLE_CHECK_SECONDS = 10
+
+def _has_new_mail(mail: IMAPClient) -> bool:
+    """
+    Checks for unseen messages that arrived after the last scan.
+
+    The EXISTS notice for mail delivered while SEARCH/FETCH/STORE were running
+    comes back with those commands and is never repeated by IDLE.
+    """
+    # "n:*" always matches the newest message, so filter on the UID as well
+    return any(uid > _last_scanned_uid for uid in mail.search(["UNSEEN", "UID", f"{_last_scanned_uid + 1}:*"]))
+
+def wait_for_mail():
     """
-    Extracts a transaction ID from the email body using regex patterns.
-    Falls back to a timestamp-based ID if no pattern matches.
+    Blocks in IMAP IDLE until the server pushes a mailbox change (e.g. a new
+    message), IMAP_RESCAN_SECONDS (capped at IMAP_IDLE_SECONDS) elapse, or
+    `stop` is requested. Returns at once if mail arrived since the last scan.
+
+    On connection errors the session is dropped so that the next call logs in
+    again; a short pause prevents a tight reconnect loop.
     """
-    patterns = [
-        r"Reference\s*(?:No\.?|number)?\s*[:\-]?\s*(\d{8,})",
-        r"transaction reference number\s*(?:is)?\s*[:\-]?\s*(\d{8,})",
-    ]
-    for pat in patterns:
-        match = re.search(pat, body, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    # Fallback for emails where the regex fails
-    return f"TXN{int(time.time())}"
+    with imap_lock:
+        try:
+            mail = _get_imap()
+            if _has_new_mail(mail):
+                return
+            deadline = time.monotonic() + min(IMAP_IDLE_SECONDS, IMAP_RESCAN_SECONDS)
+            mail.idle()
+            try:
+                while not _stop.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or mail.idle_check(timeout=min(remaining, _IDLE_CHECK_SECONDS)):
+                        break
+            finally:
+                mail.idle_done()
+            return
+        except (IMAPClientAbortError, OSError) as e:
+            log(f"IMAP IDLE interrupted: {e}", "WARN")
+            _drop_imap()
+        except Exception as e:
+            log(f"Error waiting for email: {e}", "ERROR")
+    _stop.wait(5)
 
-_AMT_5_RE = re.compile(r"(?:₹|rs\.?|inr)\s*[, ]*\s*5(?:[.,]00)?\b", re.IGNORECASE)
+# Bank credit alerts never carry more than this much plain text.
+_MAX_BODY_BYTES = 64 * 1024
 
-def _is_valid_payment(body_lc: str) -> bool:
+def _text_body(msg: email.message.Message) -> str:
     """
-    Checks if an email body indicates a valid incoming ₹5 payment.
+    Returns the plain-text body of an email, truncated to _MAX_BODY_BYTES.
+
+    For multipart emails only the first text/plain part is decoded; HTML
+    alternatives and attachments are never base64-decoded.
     """
-    is_credit = "credited" in body_lc and "debited" not in body_lc
-    is_correct_amount = bool(_AMT_5_RE.search(body_lc))
-    return is_credit and is_correct_amount
+    if msg.is_multipart():
+        part = next((p for p in msg.walk() if p.get_content_type() == "text/plain"), None)
+    else:
+        part = msg
+    if part is None:
+        return ""
+    payload = part.get_payload(decode=True) or b""
+    return payload[:_MAX_BODY_BYTES].decode(errors="ignore")
+
+def _scan_inbox(mail: IMAPClient) -> Optional[str]:
+    """
+    Scans the selected mailbox for a new, valid payment email.
+
+    All candidate messages are fetched with a single FETCH command. BODY.PEEK
+    is used so that fetching does not implicitly set the \\Seen flag; only
+    confirmed payment emails are marked as read.
+
+    Returns:
+        A new transaction ID as a string, or None if no new payments are found.
+    """
+    global _last_scanned_uid
+    # Process the most recent unseen emails, newest first
+    unseen = sorted(mail.search("UNSEEN"))[-FETCH_BATCH_SIZE:]
+    if unseen:
+        _last_scanned_uid = max(_last_scanned_uid, unseen[-1])
+    uids = [uid for uid in unseen if uid not in seen_uids]
+    if not uids:
+        return None
+
+    messages = mail.fetch(uids, ["BODY.PEEK[]"])
+    for uid in reversed(uids):
+        raw = messages.get(uid, {}).get(b"BODY[]")
+        if raw is None:
+            continue
+        body = _text_body(email.message_from_bytes(raw))
+        body_lc = body.lower()
+        if not body or not is_valid_payment(body_lc):
+            seen_uids.add(uid)
+            continue
+
+        txn_id = extract_txn_id(body_lc, uid)
+        if txn_id in seen_txn_ids:
+            logged = _txn_logged(txn_id)
+            if logged is None:
+                continue  # Sheets unreachable: leave the UID unseen so the next poll retries it
+            if logged:
+                seen_uids.add(uid)
+                continue
+
+        # Success: A new, valid transaction was found.
+        seen_uids.add(uid)
+        mail.add_flags(uid, [SEEN])  # Mark email as read
+        log(f"Found new payment. UID: {uid} -> TXN_ID: {txn_id}")
+        return txn_id
+    return None
 
 def poll_email() -> Optional[str]:
     """
     Polls the email inbox for new, unseen payment notifications.
 
+    The IMAP session is kept open between polls. If the connection has been
+    dropped, it is re-established and the poll is retried once.
+
     If a valid, new payment email is found, it extracts the transaction ID,
     marks the email as read, and returns the ID.
 
@@ -253,44 +666,15 @@ def poll_email() -> Optional[str]:
         A new transaction ID as a string, or None if no new payments are found.
     """
     with imap_lock:
-        try:
-            with _imap_login() as mail:
-                mail.select("inbox")
-                _, data = mail.search(None, "(UNSEEN)")
-                # Process the most recent 30 unseen emails
-                for uid in reversed((data[0] or b"").split()[-30:]):
-                    if uid in seen_uids:
-                        continue
-
-                    _, msg_data = mail.fetch(uid, "(RFC822)")
-                    msg = email.message_from_bytes(msg_data[0][1])
-
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body = part.get_payload(decode=True).decode(errors="ignore")
-                                break
-                    else:
-                        body = msg.get_payload(decode=True).decode(errors="ignore")
-
-                    if not body:
-                        continue
-
-                    if not _is_valid_payment(body.lower()):
-                        continue
-
-                    txn_id = _extract_txn_id(body)
-                    if txn_id in seen_txn_ids:
-                        continue
-
-                    # Success: A new, valid transaction was found.
-                    seen_uids.add(uid)
-                    mail.store(uid, "+FLAGS", "\\Seen")  # Mark email as read
-                    log(f"Found new payment. UID: {uid.decode()} -> TXN_ID: {txn_id}")
-                    return txn_id
-        except Exception as e:
-            log(f"Error polling email: {e}", "ERROR")
+        for attempt in range(2):
+            try:
+                return _scan_inbox(_get_imap())
+            except (IMAPClientAbortError, OSError) as e:
+                log(f"IMAP session lost (attempt {attempt + 1}): {e}", "WARN")
+                _drop_imap()
+            except Exception as e:
+                log(f"Error polling email: {e}", "ERROR")
+                break
 
     return None
 # ╰────────────────────────────────────────────────────────────────╯
@@ -301,29 +685,29 @@ def processor():
     """
     The processor thread function.
     
-    This loop continuously checks the `queue` for new transaction IDs. When an
-    item is found and the cooldown period has passed, it processes the item
-    by sending an MQTT message.
+    This loop blocks on `queue` until a transaction ID arrives. Once the
+    cooldown period has passed, it processes the item by sending an MQTT
+    message.
     """
     global last_processed
-    while True:
-        if not queue:
-            time.sleep(1)
-            continue
-
-        now = time.time()
-        if now - last_processed < COOLDOWN_SECONDS:
-            remain = int(COOLDOWN_SECONDS - (now - last_processed))
-            log(f"Cooldown active. Waiting for {remain}s...")
-            time.sleep(1)
-            continue
-
-        txn_id = queue.popleft()
-        status[txn_id] = "Processing"
+    while not _stop.is_set():
+        txn_id = queue.get()
+        if txn_id is None:
+            continue  # Woken up by `stop`
+
+        remain = COOLDOWN_SECONDS - (time.time() - last_processed)
+        if remain > 0:
+            log(f"Cooldown active. Waiting for {int(remain)}s...")
+            if _stop.wait(remain):
+                break
+
+        with status_lock:
+            status[txn_id] = "Processing"
         log(f"⚙️  Processing {txn_id}...")
-        
+
         ok = send_mqtt()
-        status[txn_id] = "Completed" if ok else "Failed"
+        with status_lock:
+            status[txn_id] = "Completed" if ok else "Failed"
         log(("✔" if ok else "❌") + f"  Completed processing {txn_id}")
         last_processed = time.time()
 
@@ -333,19 +717,25 @@ def main_loop():
     
     This loop continuously calls `poll_email` to check for new payments. If a
     new transaction is found, it logs the payment to Google Sheets and adds
-    it to the processing queue.
+    it to the processing queue. Once the inbox holds no further payments, it
+    waits in IMAP IDLE until the server reports new mail.
     """
     log("Scanning inbox for payments...")
-    while True:
+    while not _stop.is_set():
         txn_id = poll_email()
-        if txn_id and txn_id not in status:
-            status[txn_id] = "Queued"
-            log_payment(txn_id)  # Log to Sheets first
-            queue.append(txn_id)
-            log(f"📩 Queued {txn_id}. Queue size: {len(queue)}")
-        
-        # Wait before the next poll
-        time.sleep(5)
+        if txn_id:
+            with status_lock:
+                is_new = txn_id not in status
+                if is_new:
+                    status[txn_id] = "Queued"
+            if is_new:
+                log_payment(txn_id)  # Queue for Sheets first
+                queue.put(txn_id)
+                log(f"📩 Queued {txn_id}. Queue size: {queue.qsize()}")
+            # More payments may be waiting; scan again before idling.
+            continue
+
+        wait_for_mail()
 # ╰────────────────────────────────────────────────────────────────╯
 
 
@@ -356,13 +746,45 @@ def start():
     
     This function is intended to be called by an external application runner
     (e.g., zen.py). It bootstraps the transaction history from Google Sheets
-    and then starts the main email polling loop and the transaction processor.
+    and then starts the main email polling loop, the transaction processor,
+    and the Google Sheets flusher.
     """
     global seen_txn_ids
     seen_txn_ids = _bootstrap_txns()
     
     log("Starting Zenorc background threads...")
-    threading.Thread(target=processor, daemon=True).start()
-    threading.Thread(target=main_loop, daemon=True).start()
+    _stop.clear()
+    for target in (sheet_flusher, processor, main_loop):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        _threads.append(thread)
     log("Zenorc background threads started.")
+
+def stop(timeout: float = 30):
+    """
+    Stops the Zenorc background threads and closes the IMAP and MQTT sessions.
+
+    Rows still waiting for Google Sheets are flushed before the flusher
+    exits. Transactions still queued for MQTT are not processed.
+
+    Args:
+        timeout: The maximum seconds to wait for each thread to exit.
+    """
+    global _mqtt_client
+    log("Stopping Zenorc background threads...")
+    _stop.set()
+    _sheet_pending.set()
+    queue.put(None)
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+    with imap_lock:
+        _drop_imap()
+    with mqtt_lock:
+        if _mqtt_client is not None:
+            _mqtt_client.disconnect()
+            _mqtt_client.loop_stop()
+            _mqtt_client = None
+    log("Zenorc background threads stopped.")
 # ╰────────────────────────────────────────────────────────────────╯
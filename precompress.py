@@ -0,0 +1,32 @@
+# precompress.py :: Build-time compression of the static UI
+#
+# Writes "<file>.br" and "<file>.gz" next to every text asset in static/, so
+# that main.PrecompressedStaticFiles can serve them with Content-Encoding
+# instead of compressing per request. Run once at build (see Dockerfile).
+# The .br variant is skipped when the `brotli` package is not installed.
+
+import gzip
+import pathlib
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TEXT_SUFFIXES = {".html", ".css", ".js", ".svg", ".json"}
+
+
+def main(static_dir: str = "static") -> None:
+    for path in sorted(pathlib.Path(static_dir).rglob("*")):
+        if path.suffix not in TEXT_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+        print(f"Precompressed {path}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,20 @@
+# setup.py :: Optional native build of the Zenorc payment parser
+#
+# Compiles ai_agents/_payment_parser.py to a C extension with mypyc. ai_agents/
+# is not a package, so the extension is the top-level module _payment_parser;
+# package_dir maps the top level to ai_agents/, which makes build_ext --inplace
+# write it next to the source. zenorc imports it either as a sibling of its
+# package or as a top-level module; skipping this step leaves the pure-Python
+# module in use.
+#
+#   pip install mypy setuptools
+#   python setup.py build_ext --inplace
+
+from mypyc.build import mypycify
+from setuptools import setup
+
+setup(
+    name="zenorc-payment-parser",
+    package_dir={"": "ai_agents"},
+    ext_modules=mypycify(["ai_agents/_payment_parser.py"]),
+)
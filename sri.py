@@ -0,0 +1,43 @@
+# sri.py :: Build-time Subresource Integrity for the static UI
+#
+# Fetches every cross-origin <script src> and stylesheet <link href> in the
+# given HTML file and stamps it with integrity="sha384-..." and
+# crossorigin="anonymous". Run once at build, before precompress.py (see
+# Dockerfile). Only exact-version URLs are safe to pin this way: a range like
+# "pkg@4" can resolve to a new file later and break the hash.
+
+import base64
+import functools
+import hashlib
+import re
+import sys
+import urllib.request
+
+# <script ... src="https://..."> and <link ... href="https://..."> loading a stylesheet
+TAG_RE = re.compile(r'<(?:script|link)\b[^>]*?\b(?:src|href)="(https://[^"]+\.(?:js|css))"[^>]*>')
+
+
+@functools.lru_cache(maxsize=None)
+def sri(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=30) as resp:
+        digest = hashlib.sha384(resp.read()).digest()
+    return "sha384-" + base64.b64encode(digest).decode()
+
+
+def stamp(match: "re.Match[str]") -> str:
+    tag, url = match.group(0), match.group(1)
+    if "integrity=" in tag:
+        return tag
+    print(f"Hashed {url}")
+    return f'{tag[:-1]} integrity="{sri(url)}" crossorigin="anonymous">'
+
+
+def main(html_path: str = "static/index.html") -> None:
+    with open(html_path, encoding="utf-8") as f:
+        html = TAG_RE.sub(stamp, f.read())  # Fetch everything before touching the file
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
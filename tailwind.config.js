@@ -0,0 +1,7 @@
+// Tailwind build for the Repo-Ranger UI. Only classes used in static/index.html
+// (markup and JS template strings) end up in the generated static/app.css.
+module.exports = {
+  content: ["./static/index.html"],
+  theme: { extend: {} },
+  plugins: [],
+};